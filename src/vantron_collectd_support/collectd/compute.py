@@ -0,0 +1,314 @@
+import math
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+import collectd  # type: ignore
+
+from vantron_collectd_support.derived import (
+    DERIVED_PLUGIN,
+    DERIVED_TYPE,
+    LOAD_1MIN,
+    LOAD_5MIN,
+    LOAD_15MIN,
+    POWER_PER_CPU_PERCENT,
+    interface_rate_name,
+)
+from vantron_collectd_support.util import _nn_
+
+# Readings are kept until they miss this many of their source's intervals, so
+# that values arriving on another host's schedule still make it into a batch.
+_READING_LIFETIME_INTERVALS = 2
+_DEFAULT_INTERVAL_S = 10.0
+
+# The largest step, as a fraction of the counter's width, accepted as a wrap.
+_MAX_WRAP_FRACTION = 1 / 16
+
+# Metrics are addressed with the same `plugin[-instance]/type[-instance]` paths
+# that write_mqtt uses for its state topics.
+type MetricPath = str
+type MetricKey = Tuple[str, MetricPath]
+
+
+@dataclass(frozen=True)
+class Value:
+    """The raw reading of a data source, as dispatched."""
+
+    path: MetricPath
+    index: int = 0
+
+
+@dataclass(frozen=True)
+class Rate:
+    """The per-second rate of change of a counter data source.
+
+    DERIVE sources (like `if_octets`) that go backwards have been reset, and no rate is computed for that interval.
+    Sources of collectd's COUNTER type set `wraps`, so that a counter that plausibly overflowed is accounted for.
+    """
+
+    path: MetricPath
+    index: int = 0
+    wraps: bool = False
+
+
+@dataclass(frozen=True)
+class Sum:
+    terms: Tuple["Expr", ...]
+
+
+@dataclass(frozen=True)
+class Ratio:
+    """The quotient of two expressions.
+
+    A positive `min_denominator` clamps the denominator, so that the ratio stays meaningful as it approaches zero.
+    Otherwise, a zero denominator skips the metric for that interval.
+    """
+
+    numerator: "Expr"
+    denominator: "Expr"
+    min_denominator: float = 0.0
+
+
+@dataclass(frozen=True)
+class Scale:
+    term: "Expr"
+    factor: float
+    offset: float = 0.0
+
+
+type Expr = Value | Rate | Sum | Ratio | Scale
+
+
+@dataclass(frozen=True)
+class DerivedMetric:
+    name: str
+    expr: Expr
+
+
+@dataclass
+class _Sample:
+    time: float
+    values: List[int | float]
+
+
+@dataclass
+class _Reading:
+    values: List[float]
+    expires_at: float
+
+
+class _SkippedMetricError(Exception):
+    pass
+
+
+class _MissingInputError(_SkippedMetricError):
+    pass
+
+
+class _UndefinedRatioError(_SkippedMetricError):
+    pass
+
+
+@dataclass
+class ComputeStage:
+    """Derives metrics from the values written through collectd, once per interval.
+
+    The latest reading of every value passing through the write path is kept until it goes stale. On every read
+    interval, each derived metric is computed for every host with fresh readings of its inputs, and dispatched as a
+    single gauge so that consumers only have to read it.
+    """
+
+    metrics: List[DerivedMetric]
+    _value_paths: frozenset[MetricPath] = field(init=False)
+    _counter_paths: Dict[MetricPath, bool] = field(init=False)
+    _metric_paths: Dict[str, frozenset[MetricPath]] = field(init=False)
+    _counters: Dict[MetricKey, _Sample] = field(init=False, default_factory=dict)
+    _readings: Dict[MetricKey, _Reading] = field(init=False, default_factory=dict)
+    _rates: Dict[MetricKey, _Reading] = field(init=False, default_factory=dict)
+    _lock: threading.Lock = field(init=False, default_factory=threading.Lock)
+
+    def __post_init__(self):
+        """Find the values and counters that the metrics read, and whether the counters wrap."""
+        value_paths: set[MetricPath] = set()
+        self._counter_paths = {}
+        self._metric_paths = {}
+        for metric in self.metrics:
+            inputs = [node for node in _walk(metric.expr) if isinstance(node, Value | Rate)]
+            self._metric_paths[metric.name] = frozenset(node.path for node in inputs)
+            for node in inputs:
+                match node:
+                    case Value(path=path):
+                        value_paths.add(path)
+                    case Rate(path=path, wraps=wraps):
+                        self._counter_paths[path] = self._counter_paths.get(path, False) or wraps
+        self._value_paths = frozenset(value_paths)
+
+    def record(self, values: collectd.Values, data=None):
+        """Keep the latest reading of written values that the metrics read."""
+        path = metric_path(values)
+        is_value, is_counter = path in self._value_paths, path in self._counter_paths
+        if not (is_value or is_counter) or not values.values:
+            return
+
+        key = (values.host, path)
+        expires_at = time.monotonic() + (values.interval or _DEFAULT_INTERVAL_S) * _READING_LIFETIME_INTERVALS
+        with self._lock:
+            if is_value:
+                self._readings[key] = _Reading(values=[float(v) for v in values.values], expires_at=expires_at)
+            if is_counter:
+                # Counters are handed over as ints, and must stay that way until
+                # their delta is taken, as floats cannot hold 64 bit values.
+                sample = _Sample(time=values.time, values=list(values.values))
+                self._record_counter(key, sample, expires_at, wraps=self._counter_paths[path])
+
+    def _record_counter(self, key: MetricKey, sample: _Sample, expires_at: float, wraps: bool):
+        """Compute rates from the previous reading of a counter."""
+        prev = self._counters.get(key)
+        self._counters[key] = sample
+        self._rates.pop(key, None)
+        if prev is None or sample.time <= prev.time or len(prev.values) != len(sample.values):
+            return
+
+        deltas = [
+            _counter_delta(prev_value, value, wraps)
+            for prev_value, value in zip(prev.values, sample.values, strict=True)
+        ]
+        if any(delta is None for delta in deltas):
+            collectd.debug(f"Counter {key[0]}/{key[1]} went backwards, skipping its rate")
+            return
+
+        elapsed_s = sample.time - prev.time
+        self._rates[key] = _Reading(values=[_nn_(delta) / elapsed_s for delta in deltas], expires_at=expires_at)
+
+    def dispatch(self, data=None):
+        """Compute derived metrics over the fresh readings, and push them to collectd."""
+        ts = math.floor(time.time())
+        with self._lock:
+            batch = _fresh_values(self._readings)
+            rates = _fresh_values(self._rates)
+
+        reported = {*batch, *rates}
+        for host in sorted({host for host, _ in reported}):
+            for metric in self.metrics:
+                # Only metrics that this host reports any input of can apply to it.
+                if not any((host, path) in reported for path in self._metric_paths[metric.name]):
+                    continue
+                try:
+                    result = _evaluate(metric.expr, host, batch, rates)
+                except _SkippedMetricError as e:
+                    collectd.debug(f"Skipped {host}/{metric.name}, {e}")
+                    continue
+                collectd.debug(f"Derived {host}/{metric.name}, {result}")
+
+                values = collectd.Values(host=host, plugin=DERIVED_PLUGIN, type=DERIVED_TYPE, type_instance=metric.name)
+                values.dispatch(time=ts, values=[result])
+
+
+def _fresh_values(readings: Dict[MetricKey, _Reading]) -> Dict[MetricKey, List[float]]:
+    """Drop stale readings, and return the values of those that remain."""
+    now = time.monotonic()
+    for key in [key for key, reading in readings.items() if reading.expires_at <= now]:
+        del readings[key]
+    return {key: reading.values for key, reading in readings.items()}
+
+
+def metric_path(values: collectd.PluginData) -> MetricPath:
+    """Build the `plugin[-instance]/type[-instance]` path of a value list."""
+    plugin = f"{values.plugin}-{values.plugin_instance}" if values.plugin_instance else values.plugin
+    type_ = f"{values.type}-{values.type_instance}" if values.type_instance else values.type
+    return f"{plugin}/{type_}"
+
+
+def _counter_delta(prev: int | float, value: int | float, wraps: bool) -> int | float | None:
+    """Compute the increase of a counter, or None if it was reset."""
+    if value >= prev:
+        return value - prev
+    if not wraps:
+        return None
+
+    # A counter that held a value beyond 32 bits must be a 64 bit counter.
+    width = 2**32 if prev < 2**32 else 2**64
+    delta = width - prev + value
+    # Anything but a small step across the top of the range is far more likely
+    # to be a reset than a wrap.
+    if delta > width * _MAX_WRAP_FRACTION:
+        return None
+    return delta
+
+
+def _walk(expr: Expr) -> Iterator[Expr]:
+    """Yield an expression and all of its subexpressions."""
+    yield expr
+    match expr:
+        case Sum(terms=terms):
+            for term in terms:
+                yield from _walk(term)
+        case Ratio(numerator=numerator, denominator=denominator):
+            yield from _walk(numerator)
+            yield from _walk(denominator)
+        case Scale(term=term):
+            yield from _walk(term)
+
+
+def _lookup(readings: Dict[MetricKey, List[float]], host: str, path: MetricPath, index: int) -> float:
+    """Return a single data source reading, or raise if it was not reported."""
+    reading = readings.get((host, path))
+    if reading is None or index >= len(reading):
+        raise _MissingInputError(f"{path} has no fresh reading")
+    return reading[index]
+
+
+def _evaluate(expr: Expr, host: str, batch: Dict[MetricKey, List[float]], rates: Dict[MetricKey, List[float]]) -> float:
+    """Evaluate an expression against a host's batch of values."""
+    match expr:
+        case Value(path=path, index=index):
+            return _lookup(batch, host, path, index)
+
+        case Rate(path=path, index=index):
+            return _lookup(rates, host, path, index)
+
+        case Sum(terms=terms):
+            return sum(_evaluate(term, host, batch, rates) for term in terms)
+
+        case Ratio(numerator=numerator, denominator=denominator, min_denominator=min_denominator):
+            divisor = _evaluate(denominator, host, batch, rates)
+            if min_denominator > 0:
+                divisor = max(divisor, min_denominator)
+            if divisor == 0:
+                raise _UndefinedRatioError(f"{denominator} is zero")
+            return _evaluate(numerator, host, batch, rates) / divisor
+
+        case Scale(term=term, factor=factor, offset=offset):
+            return _evaluate(term, host, batch, rates) * factor + offset
+
+        case _:
+            raise ValueError(f"{expr} is not a valid expression")
+
+
+def _interface_rates(interface: str) -> Iterable[DerivedMetric]:
+    """Declare the traffic rates of a network interface."""
+    path = f"interface-{interface}/if_octets"
+    # The data sources of if_octets are ordered rx, tx. Seen from the router,
+    # what its LAN interfaces receive from clients is on its way out.
+    outgoing, incoming = Rate(path, 0), Rate(path, 1)
+
+    yield DerivedMetric(interface_rate_name(interface, "outgoing"), outgoing)
+    yield DerivedMetric(interface_rate_name(interface, "incoming"), incoming)
+    yield DerivedMetric(interface_rate_name(interface, "total"), Sum((outgoing, incoming)))
+
+
+DERIVED_METRICS: List[DerivedMetric] = [
+    DerivedMetric(LOAD_1MIN, Scale(Value("load/load", 0), 100.0)),
+    DerivedMetric(LOAD_5MIN, Scale(Value("load/load", 1), 100.0)),
+    DerivedMetric(LOAD_15MIN, Scale(Value("load/load", 2), 100.0)),
+    *_interface_rates("br-lan"),
+    *_interface_rates("rax0"),
+    DerivedMetric(
+        POWER_PER_CPU_PERCENT,
+        # Clamped to 1% busy, as power draw over a near idle CPU is dominated by
+        # the baseline and would otherwise be published as thousands of W/%.
+        Ratio(Value("power_use/gauge"), Scale(Value("cpu/percent-idle"), -1.0, offset=100.0), min_denominator=1.0),
+    ),
+]
@@ -1,5 +1,6 @@
 import collectd  # type: ignore
 
+from .compute import DERIVED_METRICS, ComputeStage
 from .cpu import read_cpu_metrics
 from .power import read_power_consumption
 
@@ -9,6 +10,10 @@ def configure_plugin(event: collectd.Config, data: object | None = None):
     collectd.info("Setting up Vantron plugin")
 
 
+compute_stage = ComputeStage(DERIVED_METRICS)
+
 collectd.register_config(configure_plugin)
 collectd.register_read(read_cpu_metrics)
 collectd.register_read(read_power_consumption)
+collectd.register_write(compute_stage.record)
+collectd.register_read(compute_stage.dispatch)
@@ -0,0 +1,25 @@
+from typing import Literal
+
+# The names of the metrics derived by the collectd plugin's compute stage, and
+# of the state topics they are published on. Shared by the plugin and the HA
+# discovery topics, so this module must not import collectd.
+
+DERIVED_PLUGIN = "derived"
+DERIVED_TYPE = "gauge"
+
+LOAD_1MIN = "load_1min"
+LOAD_5MIN = "load_5min"
+LOAD_15MIN = "load_15min"
+POWER_PER_CPU_PERCENT = "power_per_cpu_percent"
+
+type TrafficDirection = Literal["outgoing", "incoming", "total"]
+
+
+def interface_rate_name(interface: str, direction: TrafficDirection) -> str:
+    """Return the name of a network interface's traffic rate metric."""
+    return f"{interface.replace('-', '_')}_{direction}_rate"
+
+
+def derived_topic(name: str) -> str:
+    """Return the write_mqtt state topic path of a derived metric."""
+    return f"{DERIVED_PLUGIN}/{DERIVED_TYPE}-{name}"
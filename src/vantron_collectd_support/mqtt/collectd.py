@@ -1,11 +1,11 @@
 from collections.abc import Generator
-from functools import partial
 from textwrap import dedent
 
 from ha_mqtt_discoverable.device_class import BinarySensorDeviceClass, SensorDeviceClass
 from ha_mqtt_discoverable.sensors import BinarySensorInfo, DeviceInfo, EntityInfo, SensorInfo
 from stringcase import capitalcase, spinalcase
 
+from ..derived import LOAD_1MIN, LOAD_5MIN, LOAD_15MIN, POWER_PER_CPU_PERCENT, derived_topic, interface_rate_name
 from ..util import _nn_
 
 DISK_FREE_ROOT_FS = "root"
@@ -149,20 +149,20 @@ def load_topics(device: DeviceInfo) -> Generator[tuple[EntityInfo, StateTopicPat
         "suggested_display_precision": 1,
         "icon": "mdi:chart-histogram",
         "unique_id": "",
+        "value_template": _value_template_for_index(1),
     }
 
-    load_value_template = partial(_value_template_for_index, transform_expr=" * 100.0")
     yield (
-        _populate(SensorInfo(name="Load Avg. 1min", value_template=load_value_template(1), **shared_args)),
-        "load/load",
+        _populate(SensorInfo(name="Load Avg. 1min", **shared_args)),
+        derived_topic(LOAD_1MIN),
     )
     yield (
-        _populate(SensorInfo(name="Load Avg. 5min", value_template=load_value_template(2), **shared_args)),
-        "load/load",
+        _populate(SensorInfo(name="Load Avg. 5min", **shared_args)),
+        derived_topic(LOAD_5MIN),
     )
     yield (
-        _populate(SensorInfo(name="Load Avg. 15min", value_template=load_value_template(3), **shared_args)),
-        "load/load",
+        _populate(SensorInfo(name="Load Avg. 15min", **shared_args)),
+        derived_topic(LOAD_15MIN),
     )
 
 
@@ -211,6 +211,20 @@ def power_topics(device: DeviceInfo) -> Generator[tuple[EntityInfo, StateTopicPa
         ),
         "power_use/gauge",
     )
+    yield (
+        _populate(
+            SensorInfo(
+                name="Power per CPU Percent",
+                device=device,
+                unit_of_measurement="W/%",
+                suggested_display_precision=3,
+                icon="mdi:flash",
+                unique_id="",
+                value_template=_value_template_for_index(1),
+            )
+        ),
+        derived_topic(POWER_PER_CPU_PERCENT),
+    )
 
 
 def disk_free_topics(
@@ -285,63 +299,33 @@ def network_topics(device: DeviceInfo, ping_host="1.1.1.1") -> Generator[tuple[E
         ),
         "dhcpleases/count",
     )
+    yield from _traffic_rate_topics(device, "br-lan", "Wired", icon="mdi:router-network")
+    yield from _traffic_rate_topics(device, "rax0", "Wireless", icon="mdi:router-network-wireless")
+
+
+def _traffic_rate_topics(
+    device: DeviceInfo, interface: str, label: str, icon: str
+) -> Generator[tuple[EntityInfo, StateTopicPath]]:
+    """Generate traffic rate topics for an interface, as derived by the Vantron plugin."""
+    shared_args = {
+        "device": device,
+        "device_class": SensorDeviceClass.DATA_RATE,
+        "unit_of_measurement": "B/s",
+        "suggested_display_precision": 1,
+        "icon": icon,
+        "unique_id": "",
+        "value_template": _value_template_for_index(1),
+    }
+
     yield (
-        _populate(
-            SensorInfo(
-                name="Wired Outgoing Traffic Rate",
-                device=device,
-                device_class=SensorDeviceClass.DATA_RATE,
-                unit_of_measurement="B/s",
-                suggested_display_precision=1,
-                icon="mdi:router-network",
-                unique_id="",
-                value_template=_value_template_for_index(1),
-            )
-        ),
-        "interface-br-lan/if_octets",
-    )
-    yield (
-        _populate(
-            SensorInfo(
-                name="Wired Incoming Traffic Rate",
-                device=device,
-                device_class=SensorDeviceClass.DATA_RATE,
-                unit_of_measurement="B/s",
-                suggested_display_precision=1,
-                icon="mdi:router-network",
-                unique_id="",
-                value_template=_value_template_for_index(2),
-            )
-        ),
-        "interface-br-lan/if_octets",
+        _populate(SensorInfo(name=f"{label} Outgoing Traffic Rate", **shared_args)),
+        derived_topic(interface_rate_name(interface, "outgoing")),
     )
     yield (
-        _populate(
-            SensorInfo(
-                name="Wireless Outgoing Traffic Rate",
-                device=device,
-                device_class=SensorDeviceClass.DATA_RATE,
-                unit_of_measurement="B/s",
-                suggested_display_precision=1,
-                icon="mdi:router-network-wireless",
-                unique_id="",
-                value_template=_value_template_for_index(1),
-            )
-        ),
-        "interface-rax0/if_octets",
+        _populate(SensorInfo(name=f"{label} Incoming Traffic Rate", **shared_args)),
+        derived_topic(interface_rate_name(interface, "incoming")),
     )
     yield (
-        _populate(
-            SensorInfo(
-                name="Wireless Incoming Traffic Rate",
-                device=device,
-                device_class=SensorDeviceClass.DATA_RATE,
-                unit_of_measurement="B/s",
-                suggested_display_precision=1,
-                icon="mdi:router-network-wireless",
-                unique_id="",
-                value_template=_value_template_for_index(2),
-            )
-        ),
-        "interface-rax0/if_octets",
+        _populate(SensorInfo(name=f"{label} Total Traffic Rate", **shared_args)),
+        derived_topic(interface_rate_name(interface, "total")),
     )
@@ -0,0 +1,39 @@
+import sys
+import types
+
+import pytest
+
+# The collectd module only exists inside the collectd daemon's embedded
+# interpreter, so tests stand in a minimal replacement that records dispatches.
+collectd = types.ModuleType("collectd")
+collectd.dispatched = []  # type: ignore
+
+
+class _Values:
+    def __init__(self, **kwargs):
+        self.host = ""
+        self.plugin = ""
+        self.plugin_instance = ""
+        self.type = ""
+        self.type_instance = ""
+        self.time = 0
+        self.interval = None
+        self.values = None
+        self.__dict__.update(kwargs)
+
+    def dispatch(self, **kwargs):
+        self.__dict__.update(kwargs)
+        collectd.dispatched.append(self)  # type: ignore
+
+
+collectd.Values = _Values  # type: ignore
+collectd.PluginData = _Values  # type: ignore
+collectd.debug = collectd.info = collectd.warning = collectd.error = lambda msg: None  # type: ignore
+sys.modules.setdefault("collectd", collectd)
+
+
+@pytest.fixture
+def dispatched():
+    """Yield the values dispatched to the stand-in collectd module during a test."""
+    collectd.dispatched.clear()  # type: ignore
+    yield collectd.dispatched  # type: ignore
@@ -0,0 +1,204 @@
+import time
+
+import collectd  # type: ignore
+import pytest
+
+from vantron_collectd_support.collectd.compute import (
+    DERIVED_METRICS,
+    ComputeStage,
+    DerivedMetric,
+    Rate,
+    Ratio,
+    Scale,
+    Sum,
+    Value,
+    _counter_delta,
+)
+
+IF_OCTETS = "interface-rax0/if_octets"
+
+
+def _if_octets(time: float, rx: float, tx: float):
+    return collectd.Values(
+        host="vnet", plugin="interface", plugin_instance="rax0", type="if_octets", time=time, values=[rx, tx]
+    )
+
+
+def _published(dispatched) -> dict[str, float]:
+    return {v.type_instance: v.values[0] for v in dispatched}
+
+
+@pytest.fixture
+def stage() -> ComputeStage:
+    return ComputeStage([DerivedMetric("rx_rate", Rate(IF_OCTETS, 0)), DerivedMetric("tx_rate", Rate(IF_OCTETS, 1))])
+
+
+def test_first_sample_publishes_no_rate(stage, dispatched):
+    stage.record(_if_octets(0, 1000, 100))
+    stage.dispatch()
+
+    assert _published(dispatched) == {}
+
+
+def test_rate_from_consecutive_samples(stage, dispatched):
+    stage.record(_if_octets(0, 1000, 100))
+    stage.record(_if_octets(10, 3000, 600))
+    stage.dispatch()
+
+    assert _published(dispatched) == {"rx_rate": 200.0, "tx_rate": 50.0}
+
+
+def test_reset_counter_skips_rate(stage, dispatched):
+    stage.record(_if_octets(0, 10e9, 5000))
+    stage.record(_if_octets(10, 1000, 100))
+    stage.dispatch()
+
+    assert _published(dispatched) == {}
+
+
+def test_rate_resumes_after_reset(stage, dispatched):
+    stage.record(_if_octets(0, 10e9, 5000))
+    stage.record(_if_octets(10, 1000, 100))
+    stage.record(_if_octets(20, 2000, 200))
+    stage.dispatch()
+
+    assert _published(dispatched) == {"rx_rate": 100.0, "tx_rate": 10.0}
+
+
+def test_wrapping_counter_near_the_top_of_its_range():
+    assert _counter_delta(2**32 - 100, 50, wraps=True) == 150
+    assert _counter_delta(2**64 - 100, 50, wraps=True) == 150
+
+
+def test_wrapping_64_bit_counter_through_stage(dispatched):
+    path = "interface-wan/if_packets"
+    stage = ComputeStage([DerivedMetric("rate", Rate(path, 0, wraps=True))])
+
+    def packets(time: float, value: int):
+        return collectd.Values(
+            host="vnet", plugin="interface", plugin_instance="wan", type="if_packets", time=time, values=[value, 0]
+        )
+
+    stage.record(packets(0, 2**64 - 100))
+    stage.record(packets(10, 50))
+    stage.dispatch()
+
+    assert _published(dispatched) == {"rate": 15.0}
+
+
+def test_wrapping_counter_far_from_the_top_of_its_range_is_reset():
+    assert _counter_delta(2**31, 50, wraps=True) is None
+
+
+def test_derive_counter_never_wraps():
+    assert _counter_delta(2**32 - 100, 50, wraps=False) is None
+
+
+def _gauge(plugin: str, value: float, interval: float = 10):
+    return collectd.Values(host="vantron", plugin=plugin, type="gauge", time=0, interval=interval, values=[value])
+
+
+def test_readings_outlive_a_dispatch(dispatched):
+    stage = ComputeStage([DerivedMetric("sum", Sum((Value("a/gauge"), Value("b/gauge"))))])
+
+    stage.record(_gauge("a", 1.0))
+    stage.dispatch()
+    stage.record(_gauge("b", 2.0))
+    stage.dispatch()
+
+    assert _published(dispatched) == {"sum": 3.0}
+
+
+def test_readings_expire_after_two_intervals(dispatched, monkeypatch):
+    stage = ComputeStage([DerivedMetric("a", Value("a/gauge"))])
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now)
+
+    stage.record(_gauge("a", 1.0, interval=10))
+    now += 19
+    stage.dispatch()
+    assert _published(dispatched) == {"a": 1.0}
+
+    dispatched.clear()
+    now += 2
+    stage.dispatch()
+    assert _published(dispatched) == {}
+
+
+def test_ratio_with_zero_denominator_is_skipped(dispatched):
+    stage = ComputeStage([DerivedMetric("ratio", Ratio(Value("a/gauge"), Value("b/gauge")))])
+
+    stage.record(_gauge("a", 5.0))
+    stage.record(_gauge("b", 0.0))
+    stage.dispatch()
+
+    assert _published(dispatched) == {}
+
+
+def test_ratio_denominator_is_clamped(dispatched):
+    stage = ComputeStage([DerivedMetric("ratio", Ratio(Value("a/gauge"), Value("b/gauge"), min_denominator=1.0))])
+
+    stage.record(_gauge("a", 5.0))
+    stage.record(_gauge("b", 0.1))
+    stage.dispatch()
+
+    assert _published(dispatched) == {"ratio": 5.0}
+
+
+def test_unreferenced_values_are_not_kept(dispatched):
+    stage = ComputeStage([DerivedMetric("a", Value("a/gauge"))])
+
+    stage.record(_gauge("a", 1.0))
+    stage.record(collectd.Values(host="vantron", plugin="df", plugin_instance="root", type="df_complex", values=[1.0]))
+    stage.record(collectd.Values(host="vnet", plugin="df", plugin_instance="root", type="df_complex", values=[1.0]))
+    stage.dispatch()
+
+    assert list(stage._readings) == [("vantron", "a/gauge")]
+    assert _published(dispatched) == {"a": 1.0}
+
+
+def test_scale_with_offset(dispatched):
+    stage = ComputeStage([DerivedMetric("busy", Scale(Value("a/gauge"), -1.0, offset=100.0))])
+
+    stage.record(_gauge("a", 75.0))
+    stage.dispatch()
+
+    assert _published(dispatched) == {"busy": 25.0}
+
+
+def _shipped_inputs(cpu_percent_idle: float):
+    yield collectd.Values(host="vnet", plugin="load", type="load", time=0, values=[0.5, 0.25, 0.125])
+    for time_s, rx, tx in [(0, 1000, 5000), (10, 3000, 6000)]:
+        yield collectd.Values(
+            host="vnet", plugin="interface", plugin_instance="br-lan", type="if_octets", time=time_s, values=[rx, tx]
+        )
+    yield collectd.Values(host="vantron", plugin="power_use", type="gauge", time=0, values=[5.0])
+    yield collectd.Values(
+        host="vantron", plugin="cpu", type="percent", type_instance="idle", time=0, values=[cpu_percent_idle]
+    )
+
+
+def test_shipped_metrics(dispatched):
+    stage = ComputeStage(DERIVED_METRICS)
+    for values in _shipped_inputs(cpu_percent_idle=75.0):
+        stage.record(values)
+    stage.dispatch()
+
+    assert {(v.host, v.type_instance): v.values[0] for v in dispatched} == {
+        ("vnet", "load_1min"): 50.0,
+        ("vnet", "load_5min"): 25.0,
+        ("vnet", "load_15min"): 12.5,
+        ("vnet", "br_lan_outgoing_rate"): 200.0,
+        ("vnet", "br_lan_incoming_rate"): 100.0,
+        ("vnet", "br_lan_total_rate"): 300.0,
+        ("vantron", "power_per_cpu_percent"): 0.2,
+    }
+
+
+def test_shipped_power_per_cpu_percent_is_clamped_when_idle(dispatched):
+    stage = ComputeStage(DERIVED_METRICS)
+    for values in _shipped_inputs(cpu_percent_idle=99.9):
+        stage.record(values)
+    stage.dispatch()
+
+    assert _published(dispatched)["power_per_cpu_percent"] == 5.0